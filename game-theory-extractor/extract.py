@@ -1,39 +1,101 @@
 #!/usr/bin/env python3
 """Extract game theory concepts from PDF into Prolog knowledge base."""
 
+import asyncio
+import atexit
+import contextlib
+import functools
+import hashlib
 import json
 import os
+import queue
+import random
 import sys
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 
 import anthropic
 from anthropic import APIError, RateLimitError
 from pypdf import PdfReader
 
-from prompts import EXTRACTION_PROMPT
+from prompts import PAGE_PROMPT, SYSTEM_INSTRUCTIONS
 from validate import validate_prolog_syntax
 
 STATE_FILE = "state.json"
+BATCH_FILE = "output/batch.json"
 KNOWLEDGE_FILE = "output/knowledge.pl"
 RAW_DIR = "output/raw"
+CACHE_DIR = "output/cache"
+PAGES_DIR = "output/pages"
+
+MODEL = "claude-sonnet-4-20250514"
+MAX_TOKENS = 1024
+MIN_PAGE_CHARS = 50
+BATCH_POLL_SECONDS = 30
+BATCH_RESUME_MAX_AGE = 29 * 24 * 60 * 60  # batch results are kept for 29 days
+CONCURRENCY = 8
+MAX_RETRIES = 3
+KB_BUFFER_BYTES = 1 << 20
+STATE_FLUSH_INTERVAL = 10
+WRITE_QUEUE_SIZE = 4
 
 # Ensure output directories exist
 Path(RAW_DIR).mkdir(parents=True, exist_ok=True)
+Path(CACHE_DIR).mkdir(parents=True, exist_ok=True)
+
+# Knowledge base handle, held open for the whole run (see init_knowledge_base)
+_kb_file = None
+
+# Checkpoint held in memory between flushes (see save_state)
+_state = {"next_page": 1, "dirty": False, "unflushed": 0}
+
+
+@functools.lru_cache(maxsize=1)
+def get_client() -> anthropic.Anthropic:
+    """Return the shared API client, built on first use."""
+    return anthropic.Anthropic()
 
 
 def load_state() -> int:
-    """Load last successful page from state file. Returns 1 if no state."""
+    """Load the next page to process from state file. Returns 1 if no state."""
     if os.path.exists(STATE_FILE):
         with open(STATE_FILE) as f:
-            return json.load(f).get("current_page", 1)
+            state = json.load(f)
+        if "next_page" in state:
+            return state["next_page"]
+        # Older state files recorded the last page already processed
+        return state.get("current_page", 0) + 1
     return 1
 
 
 def save_state(page_num: int) -> None:
-    """Persist current page for crash recovery."""
-    with open(STATE_FILE, "w") as f:
-        json.dump({"current_page": page_num}, f)
+    """Record page_num as done, flushing the checkpoint every STATE_FLUSH_INTERVAL pages."""
+    _state["next_page"] = page_num + 1
+    _state["dirty"] = True
+    _state["unflushed"] += 1
+    if _state["unflushed"] >= STATE_FLUSH_INTERVAL:
+        flush_state()
+
+
+def flush_state() -> None:
+    """Sync the knowledge base, then atomically write the checkpoint if it changed."""
+    if not _state["dirty"]:
+        return
+
+    if _kb_file is not None:
+        _kb_file.flush()
+        os.fsync(_kb_file.fileno())
+
+    tmp_path = f"{STATE_FILE}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(f'{{"next_page": {_state["next_page"]}}}')
+    os.replace(tmp_path, STATE_FILE)
+
+    _state["dirty"] = False
+    _state["unflushed"] = 0
 
 
 def log_skip(page_num: int) -> None:
@@ -51,6 +113,11 @@ def log_invalid_output(page_num: int, output: str) -> None:
     print(f"  [INVALID] Page {page_num}: failed syntax validation")
 
 
+def log_batch_failure(page_num: int, result_type: str) -> None:
+    """Log batch requests that did not succeed (errored, canceled, expired)."""
+    print(f"  [FAILED] Page {page_num}: batch request {result_type}")
+
+
 def save_raw_response(page_num: int, response: str) -> None:
     """Save raw Claude response for debugging."""
     path = Path(RAW_DIR) / f"page_{page_num:03d}.txt"
@@ -58,19 +125,85 @@ def save_raw_response(page_num: int, response: str) -> None:
         f.write(response)
 
 
+def cache_path(params: dict) -> Path:
+    """Cache file for a request, keyed by SHA-256 of its full parameters."""
+    key = hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+    return Path(CACHE_DIR) / f"{key}.json"
+
+
+def load_cached_response(params: dict) -> str | None:
+    """Return the cached response for a request, or None on a miss."""
+    path = cache_path(params)
+    if path.exists():
+        with open(path) as f:
+            return json.load(f)["response"]
+    return None
+
+
+def save_cached_response(params: dict, page_num: int, response: str) -> None:
+    """Cache a response atomically so an interrupted write never leaves a partial entry."""
+    path = cache_path(params)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump({"response": response, "page_num": page_num}, f)
+    os.replace(tmp_path, path)
+
+
+def save_pending_batch(batch_id: str, submitted: dict[int, dict]) -> None:
+    """Record a submitted batch and each page's request cache key so a rerun can resume it."""
+    pending = {
+        "batch_id": batch_id,
+        "created_at": time.time(),
+        "requests": {
+            str(page_num): cache_path(params).stem for page_num, params in submitted.items()
+        },
+    }
+    tmp_path = f"{BATCH_FILE}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(pending, f)
+    os.replace(tmp_path, BATCH_FILE)
+
+
+def load_pending_batch(submitted: dict[int, dict]) -> str | None:
+    """Return the recorded batch ID if it is recent and covers every request in submitted."""
+    if not os.path.exists(BATCH_FILE):
+        return None
+    with open(BATCH_FILE) as f:
+        pending = json.load(f)
+    if time.time() - pending.get("created_at", 0) > BATCH_RESUME_MAX_AGE:
+        return None
+    requests = pending["requests"]
+    for page_num, params in submitted.items():
+        if requests.get(str(page_num)) != cache_path(params).stem:
+            return None
+    return pending["batch_id"]
+
+
+def clear_pending_batch() -> None:
+    """Forget the recorded batch once all its results have been consumed."""
+    if os.path.exists(BATCH_FILE):
+        os.remove(BATCH_FILE)
+
+
 def append_to_knowledge_base(prolog_facts: str) -> None:
-    """Append validated Prolog facts to knowledge base."""
-    with open(KNOWLEDGE_FILE, "a") as f:
-        f.write(prolog_facts)
-        if not prolog_facts.endswith("\n"):
-            f.write("\n")
+    """Append validated Prolog facts to knowledge base (buffered until the next checkpoint)."""
+    _kb_file.write(prolog_facts)
+    if not prolog_facts.endswith("\n"):
+        _kb_file.write("\n")
 
 
 def init_knowledge_base() -> None:
-    """Initialize knowledge base with schema declarations."""
-    if not os.path.exists(KNOWLEDGE_FILE):
-        with open(KNOWLEDGE_FILE, "w") as f:
-            f.write("""%% Game Theory Knowledge Base
+    """Open the knowledge base for the run, writing schema declarations if new."""
+    global _kb_file
+    if _kb_file is not None:
+        return
+
+    is_new = not os.path.exists(KNOWLEDGE_FILE)
+    _kb_file = open(KNOWLEDGE_FILE, "a", buffering=KB_BUFFER_BYTES)
+    atexit.register(_kb_file.close)
+
+    if is_new:
+        _kb_file.write("""%% Game Theory Knowledge Base
 %% Extracted from game-theory-101.pdf
 
 :- dynamic concept/3.
@@ -90,108 +223,392 @@ valid_relation_type(contains).    % A includes B
 """)
 
 
-def call_claude(page_text: str, page_num: int) -> str:
-    """Call Claude API to extract Prolog facts from page text."""
-    client = anthropic.Anthropic()
+def build_request_params(page_text: str, page_num: int) -> dict:
+    """Build Messages API parameters for extracting one page."""
+    prompt = PAGE_PROMPT.format(page_num=page_num, page_text=page_text)
+
+    return {
+        "model": MODEL,
+        "max_tokens": MAX_TOKENS,
+        "temperature": 0,
+        # Marked for caching, which has no effect while SYSTEM_INSTRUCTIONS is below
+        # the model's minimum cacheable prefix (see prompts.py)
+        "system": [
+            {"type": "text", "text": SYSTEM_INSTRUCTIONS, "cache_control": {"type": "ephemeral"}}
+        ],
+        "messages": [
+            {"role": "user", "content": prompt}
+        ],
+    }
+
+
+async def call_claude(client: anthropic.AsyncAnthropic, page_text: str, page_num: int) -> str:
+    """Call Claude API to extract Prolog facts from page text, retrying with backoff."""
+    params = build_request_params(page_text, page_num)
+
+    cached = load_cached_response(params)
+    if cached is not None:
+        return cached
+
+    for attempt in range(MAX_RETRIES):
+        try:
+            message = await client.messages.create(**params)
+        except RateLimitError:
+            if attempt == MAX_RETRIES - 1:
+                raise
+            wait_time = 2 ** attempt + random.random()
+            print(f"  [RATE LIMIT] Page {page_num}: waiting {wait_time:.1f}s before retry...")
+            await asyncio.sleep(wait_time)
+        except APIError as e:
+            log_error(page_num, e)
+            if attempt == MAX_RETRIES - 1:
+                raise
+        else:
+            response = message.content[0].text
+            save_cached_response(params, page_num, response)
+            return response
+
+
+async def extract_page(client: anthropic.AsyncAnthropic, semaphore: asyncio.Semaphore,
+                       page_text: str, page_num: int) -> tuple[int, str | None]:
+    """Extract one page once a concurrency slot is free; returns (page_num, response or None)."""
+    async with semaphore:
+        try:
+            return page_num, await call_claude(client, page_text, page_num)
+        except APIError:
+            return page_num, None
+
+
+def is_blank_page(page) -> bool:
+    """Detect pages too short to reach MIN_PAGE_CHARS from content stream size alone."""
+    contents = page.get_contents()
+    if contents is None:
+        return True
+    data = contents.get_data()
+    # A short stream may still paint a form XObject ("Do"), so those pages get full extraction
+    return len(data) < MIN_PAGE_CHARS and b"Do" not in data
+
+
+def _extract_page_texts(pdf_path: str, page_nums: list[int]) -> list[str]:
+    """Extract text for a set of pages with one reader (process pool worker)."""
+    reader = PdfReader(pdf_path)
+    texts = []
+    for page_num in page_nums:
+        page = reader.pages[page_num - 1]
+        texts.append("" if is_blank_page(page) else page.extract_text() or "")
+    return texts
+
+
+def pdf_digest(pdf_path: str) -> str:
+    """SHA-256 of the PDF's bytes, read in 1 MiB chunks."""
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def extract_all_pages(pdf_path: str, start_page: int, end_page: int) -> dict[int, str]:
+    """Extract text for pages start_page..end_page (1-indexed, inclusive), cached per PDF."""
+    pages_dir = Path(PAGES_DIR) / f"{Path(pdf_path).stem}-{pdf_digest(pdf_path)[:16]}"
+    pages_dir.mkdir(parents=True, exist_ok=True)
+
+    texts = {}
+    missing = []
+    for page_num in range(start_page, end_page + 1):
+        path = pages_dir / f"page_{page_num:03d}.txt"
+        if path.exists():
+            texts[page_num] = path.read_text(encoding="utf-8")
+        else:
+            missing.append(page_num)
+
+    if missing:
+        workers = min(os.cpu_count() or 1, len(missing))
+        # Strided chunks spread dense and blank pages evenly across workers
+        chunks = [missing[i::workers] for i in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunk_results = executor.map(_extract_page_texts, repeat(pdf_path), chunks)
+            for chunk, chunk_texts in zip(chunks, chunk_results):
+                for page_num, text in zip(chunk, chunk_texts):
+                    path = pages_dir / f"page_{page_num:03d}.txt"
+                    tmp_path = path.with_suffix(".tmp")
+                    tmp_path.write_text(text, encoding="utf-8")
+                    os.replace(tmp_path, path)
+                    texts[page_num] = text
+
+    return {page_num: texts[page_num] for page_num in range(start_page, end_page + 1)}
+
+
+def read_pages(pdf_path: str, start_page: int, end_page: int) -> dict[int, str | None]:
+    """Load text for pages start_page..end_page, mapping empty or too-short pages to None."""
+    pages = {}
+    for page_num, text in extract_all_pages(pdf_path, start_page, end_page).items():
+        if not text or len(text) < MIN_PAGE_CHARS:
+            log_skip(page_num)
+            text = None
+        pages[page_num] = text
+
+    return pages
+
+
+def record_page(page_num: int, prolog_facts: str | None) -> None:
+    """Validate and append one page's response (None for a skipped page), then checkpoint."""
+    if prolog_facts is not None:
+        if validate_prolog_syntax(prolog_facts):
+            # Add page marker comment
+            append_to_knowledge_base(f"\n% === Page {page_num} ===\n{prolog_facts}")
+            print(f"  [OK] Extracted facts from page {page_num}")
+        else:
+            log_invalid_output(page_num, prolog_facts)
+            save_raw_response(page_num, prolog_facts)
+    save_state(page_num)
+
+
+def record_ready_pages(pending: dict[int, str | None], next_page: int) -> int:
+    """Record buffered responses in page order up to the first gap; return the gap's page."""
+    while next_page in pending:
+        record_page(next_page, pending.pop(next_page))
+        next_page += 1
+    return next_page
+
+
+def _write_pages(responses: queue.Queue, progress: dict) -> None:
+    """Writer thread: record queued responses until the None sentinel, draining after a failure."""
+    pending = {}
+    while (item := responses.get()) is not None:
+        if progress["error"] is not None:
+            continue
+        page_num, response = item
+        pending[page_num] = response
+        try:
+            progress["next_page"] = record_ready_pages(pending, progress["next_page"])
+        except Exception as e:
+            progress["error"] = e
 
-    prompt = EXTRACTION_PROMPT.format(page_num=page_num, page_text=page_text)
 
-    message = client.messages.create(
-        model="claude-sonnet-4-20250514",
-        max_tokens=1024,
-        messages=[
-            {"role": "user", "content": prompt}
-        ]
-    )
+@contextlib.contextmanager
+def page_writer(start_page: int):
+    """Validate and append responses on a writer thread while requests continue.
 
-    return message.content[0].text
+    Yields (responses, progress): put (page_num, response) tuples on responses,
+    with None as the response for skipped pages. On exit the queue is drained and
+    progress["next_page"] holds the first page that could not be recorded.
+    """
+    responses = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+    progress = {"next_page": start_page, "error": None}
+    writer = threading.Thread(target=_write_pages, args=(responses, progress),
+                              name="kb-writer")
+    writer.start()
+    try:
+        yield responses, progress
+    finally:
+        responses.put(None)
+        writer.join()
+    if progress["error"] is not None:
+        raise progress["error"]
+
+
+def extract_batch(pages: dict[int, str | None], start_page: int) -> int:
+    """Extract pages through the Message Batches API.
+
+    Returns the first page that could not be recorded.
+    """
+    client = get_client()
+
+    with page_writer(start_page) as (responses, progress):
+        # Skipped and cached pages never enter the batch
+        submitted = {}
+        for page_num, text in pages.items():
+            if text is None:
+                responses.put((page_num, None))
+                continue
+            params = build_request_params(text, page_num)
+            cached = load_cached_response(params)
+            if cached is not None:
+                responses.put((page_num, cached))
+            else:
+                submitted[page_num] = params
+
+        if submitted:
+            _run_batch(client, submitted, len(pages), responses)
+
+    return progress["next_page"]
+
+
+def _run_batch(client: anthropic.Anthropic, submitted: dict[int, dict], total: int,
+               responses: queue.Queue) -> None:
+    """Submit one batch (or resume an interrupted one), wait for it, and queue its results."""
+    batch_id = load_pending_batch(submitted)
+    if batch_id is not None:
+        if _resume_batch(client, batch_id, submitted, responses):
+            return
+        clear_pending_batch()
+        if not submitted:
+            return
+
+    batch = client.messages.batches.create(requests=[
+        {"custom_id": f"page-{page_num:03d}", "params": params}
+        for page_num, params in submitted.items()
+    ])
+    save_pending_batch(batch.id, submitted)
+    print(f"Submitted batch {batch.id} with {len(submitted)} pages "
+          f"({total - len(submitted)} skipped or cached)")
+
+    _wait_for_batch(client, batch)
+    _queue_results(client, batch.id, submitted, responses)
+
+    # Every result is cached or logged; failed pages go in a new batch on rerun
+    clear_pending_batch()
+
+
+def _resume_batch(client: anthropic.Anthropic, batch_id: str, submitted: dict[int, dict],
+                  responses: queue.Queue) -> bool:
+    """Finish a batch left by an interrupted run. Returns False if it cannot be resumed."""
+    try:
+        batch = client.messages.batches.retrieve(batch_id)
+    except anthropic.AnthropicError as e:
+        print(f"Cannot resume batch {batch_id} ({e}), submitting a new one")
+        return False
+
+    print(f"Resuming batch {batch.id} with {len(submitted)} pages still to record")
+    _wait_for_batch(client, batch)
+    try:
+        _queue_results(client, batch.id, submitted, responses)
+    except anthropic.AnthropicError as e:
+        # Expired or unavailable results; pages already queued were removed from submitted
+        print(f"Cannot read results of batch {batch_id} ({e}), submitting a new one")
+        return False
+
+    clear_pending_batch()
+    return True
+
+
+def _wait_for_batch(client: anthropic.Anthropic, batch) -> None:
+    """Poll until the batch ends, then report its request counts."""
+    while batch.processing_status != "ended":
+        time.sleep(BATCH_POLL_SECONDS)
+        batch = client.messages.batches.retrieve(batch.id)
+
+    counts = batch.request_counts
+    print(f"Batch {batch.id} ended: {counts.succeeded} succeeded, "
+          f"{counts.errored + counts.canceled + counts.expired} failed")
+
+
+def _queue_results(client: anthropic.Anthropic, batch_id: str, submitted: dict[int, dict],
+                   responses: queue.Queue) -> None:
+    """Cache and queue successful results, removing their pages from submitted."""
+    # Results stream back in arbitrary order; the writer restores page order
+    for result in client.messages.batches.results(batch_id):
+        page_num = int(result.custom_id.removeprefix("page-"))
+        params = submitted.get(page_num)
+        if params is None:
+            # A resumed batch can hold pages already cached before the interruption
+            continue
+        if result.result.type != "succeeded":
+            log_batch_failure(page_num, result.result.type)
+            continue
+        response = result.result.message.content[0].text
+        save_cached_response(params, page_num, response)
+        responses.put((page_num, response))
+        del submitted[page_num]
 
 
-def process_pdf(pdf_path: str, start_page: int | None = None, max_pages: int | None = None) -> None:
+async def extract_concurrent(pages: dict[int, str | None], start_page: int) -> int:
+    """Extract pages with at most CONCURRENCY API calls in flight.
+
+    Returns the first page that could not be recorded.
+    """
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    with page_writer(start_page) as (responses, progress):
+        for page_num, text in pages.items():
+            if text is None:
+                responses.put((page_num, None))
+
+        async with anthropic.AsyncAnthropic() as client:
+            tasks = [
+                extract_page(client, semaphore, text, page_num)
+                for page_num, text in pages.items()
+                if text is not None
+            ]
+            for next_result in asyncio.as_completed(tasks):
+                page_num, response = await next_result
+                if response is not None:
+                    # Block a worker thread, not the event loop, when the queue is full
+                    await asyncio.to_thread(responses.put, (page_num, response))
+
+    return progress["next_page"]
+
+
+def process_pdf(pdf_path: str, start_page: int | None = None, max_pages: int | None = None,
+                use_batch: bool = True) -> None:
     """Process PDF and extract concepts to Prolog knowledge base.
 
     Args:
         pdf_path: Path to PDF file
         start_page: Page to start from (1-indexed). If None, resumes from state.
         max_pages: Maximum pages to process. If None, processes all.
+        use_batch: Submit pages through the Message Batches API. If False,
+            calls the API directly with up to CONCURRENCY requests in flight.
     """
     if start_page is None:
         start_page = load_state()
         if start_page > 1:
             print(f"Resuming from page {start_page}")
 
-    reader = PdfReader(pdf_path)
-    total_pages = len(reader.pages)
+    total_pages = len(PdfReader(pdf_path).pages)
+    if start_page > total_pages:
+        print(f"All {total_pages} pages already processed. Knowledge base is {KNOWLEDGE_FILE}")
+        return
 
     if max_pages:
         end_page = min(start_page + max_pages - 1, total_pages)
     else:
         end_page = total_pages
 
-    max_retries = 3
-
     print(f"Processing pages {start_page}-{end_page} of {total_pages} from {pdf_path}")
     init_knowledge_base()
 
-    for page_num in range(start_page - 1, end_page):
-        current_page = page_num + 1
-        print(f"[{current_page}/{total_pages}] Processing page {current_page}...")
+    pages = read_pages(pdf_path, start_page, end_page)
 
-        text = reader.pages[page_num].extract_text()
+    # Flush on every exit path, including Ctrl-C (KeyboardInterrupt)
+    try:
+        if use_batch:
+            next_page = extract_batch(pages, start_page)
+        else:
+            next_page = asyncio.run(extract_concurrent(pages, start_page))
+    finally:
+        flush_state()
 
-        if not text or len(text) < 50:
-            log_skip(current_page)
-            save_state(current_page)
-            continue
-
-        for attempt in range(max_retries):
-            try:
-                prolog_facts = call_claude(text, current_page)
-
-                # Add page marker comment
-                facts_with_marker = f"\n% === Page {current_page} ===\n{prolog_facts}"
-
-                if validate_prolog_syntax(prolog_facts):
-                    append_to_knowledge_base(facts_with_marker)
-                    save_state(current_page)
-                    print(f"  [OK] Extracted facts from page {current_page}")
-                else:
-                    log_invalid_output(current_page, prolog_facts)
-                    save_raw_response(current_page, prolog_facts)
-                    save_state(current_page)
-                break
-
-            except RateLimitError:
-                wait_time = 2 ** attempt
-                print(f"  [RATE LIMIT] Waiting {wait_time}s before retry...")
-                time.sleep(wait_time)
-            except APIError as e:
-                log_error(current_page, e)
-                save_state(page_num)  # Resume from previous page
-                if attempt == max_retries - 1:
-                    raise
-
-        time.sleep(0.5)  # Base rate limiting
+    if next_page <= end_page:
+        print(f"\nExtraction incomplete: pages {next_page}-{end_page} not recorded. "
+              "Rerun to retry.")
+        return
 
     print(f"\nExtraction complete. Knowledge base saved to {KNOWLEDGE_FILE}")
 
 
 def main() -> None:
     """CLI entry point."""
-    if len(sys.argv) < 2:
-        print("Usage: python extract.py <pdf_path> [start_page]")
+    args = [arg for arg in sys.argv[1:] if arg != "--no-batch"]
+    use_batch = len(args) == len(sys.argv) - 1
+
+    if not args:
+        print("Usage: python extract.py [--no-batch] <pdf_path> [start_page]")
         print("  pdf_path: Path to the PDF file")
         print("  start_page: Optional page to start from (overrides state.json)")
+        print("  --no-batch: Call the API directly for immediate results "
+              "instead of submitting a batch")
         sys.exit(1)
 
-    pdf_path = sys.argv[1]
-    start_page = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    pdf_path = args[0]
+    start_page = int(args[1]) if len(args) > 1 else None
 
     if not os.path.exists(pdf_path):
         print(f"Error: PDF file not found: {pdf_path}")
         sys.exit(1)
 
-    process_pdf(pdf_path, start_page)
+    process_pdf(pdf_path, start_page, use_batch=use_batch)
 
 
 if __name__ == "__main__":
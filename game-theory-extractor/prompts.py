@@ -1,21 +1,21 @@
 # -*- coding: utf-8 -*-
 """Claude prompt templates for game theory concept extraction."""
 
-EXTRACTION_PROMPT = '''\
+# Static instructions, sent as the system prompt on every request. The block is
+# marked for caching, but that has no effect until it exceeds the model's minimum
+# cacheable prefix (1024 tokens for Sonnet); it is currently about 300 tokens.
+SYSTEM_INSTRUCTIONS = '''\
 You are extracting game theory concepts into Prolog facts.
 
-Page {page_num} text:
-"""
-{page_text}
-"""
-
-Extract concepts, relationships, examples, and formulas from this page.
-Output ONLY valid Prolog facts using these predicates:
+Each message contains the text of one page, labelled with its page number.
+Extract concepts, relationships, examples, and formulas from that page.
+Output ONLY valid Prolog facts using these predicates, where page is the
+page number given in the message:
 
-concept(name, {page_num}, "definition").
+concept(name, page, "definition").
 relates(concept1, concept2, relation_type).
-example(concept, {page_num}, "description").
-formula(concept, {page_num}, "expression").
+example(concept, page, "description").
+formula(concept, page, "expression").
 
 Rules:
 - Use snake_case for concept names (nash_equilibrium, not "Nash Equilibrium")
@@ -28,3 +28,10 @@ Rules:
 - Use ASCII approximations for symbols: >= for greater-equal, sum() for sigma, E[] for expected value
 
 Output facts only, no explanation.'''
+
+# Per-page user message
+PAGE_PROMPT = '''\
+Page {page_num} text:
+"""
+{page_text}
+"""'''
@@ -0,0 +1,101 @@
+"""Test checkpointing, batch resume, and in-order recording without API access"""
+import importlib
+import json
+
+import pytest
+
+
+@pytest.fixture
+def extract(tmp_path, monkeypatch):
+    """Import extract with state and output files under a temporary directory"""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "output").mkdir()
+    module = importlib.import_module("extract")
+    monkeypatch.setattr(module, "_state", {"next_page": 1, "dirty": False, "unflushed": 0})
+    return module
+
+
+def request(page_num: int, text: str = "text") -> dict:
+    """Minimal request parameters; only their cache key matters here"""
+    return {"page": page_num, "text": text}
+
+
+def test_load_state_without_file(extract):
+    """Verify a fresh run starts at page 1"""
+    assert extract.load_state() == 1
+
+
+def test_load_state_legacy_format(extract):
+    """Verify the old last-processed-page format resumes on the page after it"""
+    with open(extract.STATE_FILE, "w") as f:
+        json.dump({"current_page": 5}, f)
+    assert extract.load_state() == 6
+
+
+def test_load_state_next_page(extract):
+    """Verify the next_page format is read as-is"""
+    with open(extract.STATE_FILE, "w") as f:
+        json.dump({"next_page": 5}, f)
+    assert extract.load_state() == 5
+
+
+def test_flushed_checkpoint_resumes_after_last_page(extract):
+    """Verify a recorded page is never processed again after a rerun"""
+    extract.save_state(7)
+    extract.flush_state()
+    assert extract.load_state() == 8
+
+
+def test_record_ready_pages_stops_at_gap(extract, monkeypatch):
+    """Verify pages are recorded in order up to the first missing one"""
+    recorded = []
+    monkeypatch.setattr(extract, "record_page", lambda page_num, facts: recorded.append((page_num, facts)))
+    pending = {1: "a", 2: None, 4: "d"}
+
+    assert extract.record_ready_pages(pending, 1) == 3
+    assert recorded == [(1, "a"), (2, None)]
+    assert pending == {4: "d"}
+
+    pending[3] = "c"
+    assert extract.record_ready_pages(pending, 3) == 5
+    assert recorded[2:] == [(3, "c"), (4, "d")]
+
+
+def test_load_pending_batch_without_file(extract):
+    """Verify there is nothing to resume before any batch is submitted"""
+    assert extract.load_pending_batch({1: request(1)}) is None
+
+
+def test_load_pending_batch_same_requests(extract):
+    """Verify a batch is resumed for exactly the requests it was submitted with"""
+    submitted = {1: request(1), 2: request(2), 3: request(3)}
+    extract.save_pending_batch("batch-1", submitted)
+    assert extract.load_pending_batch(submitted) == "batch-1"
+
+
+def test_load_pending_batch_some_pages_cached(extract):
+    """Verify pages cached before the interruption do not prevent a resume"""
+    extract.save_pending_batch("batch-1", {1: request(1), 2: request(2), 3: request(3)})
+    assert extract.load_pending_batch({2: request(2)}) == "batch-1"
+
+
+@pytest.mark.parametrize("submitted", [
+    {2: request(2, "new edition")},     # same page, different request
+    {1: request(1), 4: request(4)},     # page the batch never held
+])
+def test_load_pending_batch_mismatch(extract, submitted):
+    """Verify a batch is not resumed when any submitted request differs"""
+    extract.save_pending_batch("batch-1", {1: request(1), 2: request(2), 3: request(3)})
+    assert extract.load_pending_batch(submitted) is None
+
+
+def test_load_pending_batch_expired(extract):
+    """Verify batches past the results retention window are not resumed"""
+    submitted = {1: request(1)}
+    extract.save_pending_batch("batch-1", submitted)
+    with open(extract.BATCH_FILE) as f:
+        pending = json.load(f)
+    pending["created_at"] -= extract.BATCH_RESUME_MAX_AGE + 1
+    with open(extract.BATCH_FILE, "w") as f:
+        json.dump(pending, f)
+    assert extract.load_pending_batch(submitted) is None
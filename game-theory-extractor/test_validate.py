@@ -0,0 +1,89 @@
+"""Pin the edge cases of the regex-based Prolog validators"""
+import pytest
+
+from validate import check_balanced_parens, parse_prolog_string, validate_file, validate_prolog_syntax
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('"abc"', ("abc", 5)),
+    ('"a""b"', ('a"b', 6)),      # doubled quote is an escaped quote
+    ('"a\\"b"', ('a"b', 6)),     # backslash escape keeps the next char
+    ('""', ("", 2)),
+    ('""""', ('"', 4)),
+    ('"a" rest', ("a", 3)),      # end position stops at the closing quote
+    ('"a\nb"', ("a\nb", 5)),
+])
+def test_parse_prolog_string(text, expected):
+    """Verify string contents and end positions"""
+    assert parse_prolog_string(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    '"a""',   # the "" pair must not be split to close the string
+    '"abc',
+])
+def test_parse_prolog_string_unterminated(text):
+    """Verify unterminated strings are rejected"""
+    with pytest.raises(ValueError, match="Unterminated string"):
+        parse_prolog_string(text)
+
+
+def test_parse_prolog_string_requires_quote():
+    """Verify input must start with a quote"""
+    with pytest.raises(ValueError, match="must start with quote"):
+        parse_prolog_string("abc")
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("", True),
+    ("()", True),
+    (")(", False),               # depth goes negative even though counts match
+    ("(()", False),
+    ("())", False),
+    ('"(" ', True),              # parens inside strings are ignored
+    ('(")")', True),
+    ('(a, "b\\")", c)', True),   # escaped quote does not end the string
+    ('("a""(")', True),
+    ("\\(", True),               # escaped paren outside a string
+    ('("unterminated (', False),  # unterminated trailing string swallows the rest
+])
+def test_check_balanced_parens(text, expected):
+    """Verify paren balance outside strings"""
+    assert check_balanced_parens(text) is expected
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "\n\n",
+    "% No concepts on this page",
+    "% a\n\n% b\n",
+    'concept(a, 1, "x"). % note',
+    '  concept(a, 1, "x").  ',
+    'concept(a, 1, "(").',
+    'relates(a, b, requires).\nexample(a, 2, "y").',
+    'concept(a, 1, "x").\n\n% c\n   \nformula(f, 3, "p*(1-p)").',
+])
+def test_valid_responses(text):
+    """Verify facts, comments, and blank lines are accepted"""
+    assert validate_prolog_syntax(text)
+
+
+@pytest.mark.parametrize("text", [
+    'Concept(a, 1, "x").',       # predicates are lowercase
+    'unknown(a, b).',
+    'concept(a, 1, "x")',        # missing period
+    'concept(a, 1, "x")).',
+    'concept(a, 1, "unterminated).',
+    'concept(a, 1, "x").\nbogus',
+    ":- dynamic concept/3.",     # directives are not expected in responses
+])
+def test_invalid_responses(text):
+    """Verify malformed or unexpected lines are rejected"""
+    assert not validate_prolog_syntax(text)
+
+
+def test_validate_file_skips_directives(tmp_path):
+    """Verify directives and comments are skipped and errors carry line numbers"""
+    path = tmp_path / "knowledge.pl"
+    path.write_text(':- dynamic concept/3.\n% header\n\nconcept(a, 1, "x").\nconcept(b, 2, "y"\n')
+    assert validate_file(str(path)) == (False, ["Line 5: Unbalanced parentheses"])
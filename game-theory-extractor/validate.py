@@ -9,37 +9,48 @@ VALID_PREDICATES = {"concept", "relates", "example", "formula", "valid_relation_
 # Valid relation types
 VALID_RELATION_TYPES = {"requires", "illustrates", "contrasts", "extends", "contains"}
 
-# Pattern for a Prolog fact: predicate(arg1, arg2, ...). with optional inline comment
+# Pattern for a Prolog fact: predicate(arg1, arg2, ...). with optional inline comment.
+# Predicates are lowercase atoms, so no IGNORECASE (case folding slows matching).
 FACT_PATTERN = re.compile(
-    r'^([a-z_][a-z0-9_]*)\s*\((.*)\)\s*\.\s*(%.*)?$',
-    re.IGNORECASE
+    r'^([a-z_][a-z0-9_]*)\s*\((.*)\)\s*\.\s*(%.*)?$'
 )
 
 # Pattern for comments
 COMMENT_PATTERN = re.compile(r'^%.*$')
 
+# Pattern for a Prolog string literal. Doubled quotes and backslash escapes stay
+# inside the string; the lookahead stops backtracking from splitting a "" pair.
+STRING_PATTERN = re.compile(r'"((?:[^"\\]|\\.|"")*)"(?!")', re.DOTALL)
+
+# Escape sequences inside a string literal body
+ESCAPE_PATTERN = re.compile(r'""|\\(.)', re.DOTALL)
+
+# Tokens relevant to paren balance: escapes and strings (possibly unterminated),
+# which are skipped, and parens, captured in group 1. The string body is written
+# as an unrolled loop so runs of plain characters match without alternation.
+PAREN_TOKEN_PATTERN = re.compile(r'\\.|"[^"\\]*(?:\\.[^"\\]*)*"?|([()])', re.DOTALL)
+
+# Whole-text scanner: classifies every line as blank, comment, fact, or other
+# in one pass. Whitespace classes exclude newline so matches never span lines.
+LINE_PATTERN = re.compile(
+    r'^[^\S\n]*(?:'
+    r'(?P<comment>%.*)'
+    r'|(?P<fact>(?P<predicate>[a-z_][a-z0-9_]*)[^\S\n]*\(.*\)[^\S\n]*\.[^\S\n]*(?:%.*)?)'
+    r'|(?P<other>\S.*?)'
+    r')?[^\S\n]*$',
+    re.MULTILINE
+)
+
 
 def check_balanced_parens(text: str) -> bool:
-    """Check if parentheses are balanced."""
+    """Check if parentheses outside strings are balanced."""
     count = 0
-    in_string = False
-    escape_next = False
-
-    for char in text:
-        if escape_next:
-            escape_next = False
-            continue
-        if char == '\\':
-            escape_next = True
-            continue
-        if char == '"' and not escape_next:
-            in_string = not in_string
-            continue
-        if in_string:
-            continue
-        if char == '(':
+
+    # Only parens, strings, and escapes reach Python; plain text is skipped in C
+    for paren in PAREN_TOKEN_PATTERN.findall(text):
+        if paren == '(':
             count += 1
-        elif char == ')':
+        elif paren == ')':
             count -= 1
             if count < 0:
                 return False
@@ -52,26 +63,13 @@ def parse_prolog_string(s: str) -> Tuple[str, int]:
     if not s.startswith('"'):
         raise ValueError("String must start with quote")
 
-    result = []
-    i = 1
-    while i < len(s):
-        if s[i] == '"':
-            # Check for doubled quote (escaped)
-            if i + 1 < len(s) and s[i + 1] == '"':
-                result.append('"')
-                i += 2
-            else:
-                # End of string
-                return ''.join(result), i + 1
-        elif s[i] == '\\' and i + 1 < len(s):
-            # Backslash escape (also valid in some Prolog)
-            result.append(s[i + 1])
-            i += 2
-        else:
-            result.append(s[i])
-            i += 1
-
-    raise ValueError("Unterminated string")
+    match = STRING_PATTERN.match(s)
+    if not match:
+        raise ValueError("Unterminated string")
+
+    # "" is an escaped quote; a backslash escape keeps the next char (also valid in some Prolog)
+    content = ESCAPE_PATTERN.sub(lambda m: m.group(1) or '"', match.group(1))
+    return content, match.end()
 
 
 def validate_fact(line: str) -> Tuple[bool, str]:
@@ -113,22 +111,16 @@ def validate_prolog_syntax(prolog_text: str) -> bool:
 
     Returns True if all facts are syntactically valid.
     """
-    lines = prolog_text.strip().split('\n')
-    has_facts = False
-
-    for line in lines:
-        line = line.strip()
-
-        # Skip empty lines and comments
-        if not line or line.startswith('%'):
-            continue
-
-        has_facts = True
-        is_valid, error = validate_fact(line)
-        if not is_valid:
+    # Blank and comment lines match without a fact, so a response with only
+    # comments (like "% No concepts on this page") is valid
+    for match in LINE_PATTERN.finditer(prolog_text):
+        if match.group('other') is not None:
+            return False
+        fact = match.group('fact')
+        if fact is not None and (match.group('predicate') not in VALID_PREDICATES
+                                 or not check_balanced_parens(fact)):
             return False
 
-    # A response with only comments (like "% No concepts on this page") is valid
     return True
 
 
@@ -141,7 +133,7 @@ def validate_file(filepath: str) -> Tuple[bool, list[str]]:
             line = line.strip()
 
             # Skip empty lines, comments, and directives
-            if not line or line.startswith('%') or line.startswith(':-'):
+            if not line or line.startswith(('%', ':-')):
                 continue
 
             is_valid, error = validate_fact(line)
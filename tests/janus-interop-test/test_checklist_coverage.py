@@ -1,4 +1,6 @@
 """Test that all 7 safety items from CLAUDE.dot are present"""
+import functools
+import re
 from pathlib import Path
 
 SAFETY_ITEMS = [
@@ -22,27 +24,28 @@ SAFETY_ALTERNATIVES = {
     "heartbeat": ["heartbeat", "long operation", "timeout"],
 }
 
+# One case-insensitive alternation per item (the item itself plus its
+# alternatives), so each check is a single scan of the skill content
+_SAFETY_UNION = {
+    item: re.compile(
+        "|".join(map(re.escape, [item, *SAFETY_ALTERNATIVES.get(item, [])])),
+        re.IGNORECASE,
+    )
+    for item in SAFETY_ITEMS
+}
+
 
+@functools.lru_cache(maxsize=None)
 def read_skill(skill_name: str) -> str:
     """Read skill content from SKILL.md"""
     skill_path = Path(__file__).parent.parent.parent / "skills" / skill_name / "SKILL.md"
     return skill_path.read_text()
 
 
-def similar_phrase(item: str, content: str) -> bool:
-    """Check if any alternative phrasing of the safety item is present"""
-    content_lower = content.lower()
-    alternatives = SAFETY_ALTERNATIVES.get(item, [])
-    return any(alt.lower() in content_lower for alt in alternatives)
-
-
 def test_all_safety_items_present():
     """Verify all 7 safety items from CLAUDE.dot are documented"""
     content = read_skill("janus-interop")
-    missing = []
-    for item in SAFETY_ITEMS:
-        if item.lower() not in content.lower() and not similar_phrase(item, content):
-            missing.append(item)
+    missing = [item for item, pattern in _SAFETY_UNION.items() if not pattern.search(content)]
 
     assert not missing, f"Missing safety items in janus-interop: {missing}"
 
@@ -1,8 +1,14 @@
 """Test that example code in janus-interop follows safe patterns"""
+import functools
 import re
 from pathlib import Path
 
+# Known undefined predicates that should not appear, matched as whole words in one pass
+UNDEFINED_PREDICATES = ["log_error"]
+_UNDEFINED_PREDICATE_RE = re.compile(r"\b(?:" + "|".join(map(re.escape, UNDEFINED_PREDICATES)) + r")\b")
 
+
+@functools.lru_cache(maxsize=None)
 def read_skill(skill_name: str) -> str:
     """Read skill content from SKILL.md"""
     skill_path = Path(__file__).parent.parent.parent / "skills" / skill_name / "SKILL.md"
@@ -22,13 +28,10 @@ def test_no_undefined_predicates():
     """Verify example code doesn't use undefined predicates like log_error/1"""
     content = read_skill("janus-interop")
 
-    # Known undefined predicates that should not appear
-    undefined_predicates = ["log_error"]
-
     prolog_blocks = extract_code_blocks(content, "prolog")
     for block in prolog_blocks:
-        for pred in undefined_predicates:
-            assert pred not in block, f"Undefined predicate '{pred}' found in Prolog example"
+        match = _UNDEFINED_PREDICATE_RE.search(block)
+        assert not match, f"Undefined predicate '{match.group()}' found in Prolog example"
 
 
 def test_uses_print_message_for_errors():
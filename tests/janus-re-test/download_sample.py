@@ -1,33 +1,40 @@
 #!/usr/bin/env python3
-"""Download a sample from decompile-ghidra-100k for testing."""
+"""Download a sample from decompile-ghidra-100k for testing.
+
+Samples are streamed to disk as JSON Lines (one compact object per line),
+so memory use stays flat however many samples are fetched.
+"""
 
 from datasets import load_dataset
 import json
 
+NUM_SAMPLES = 10
+
 # Load a small streaming sample
 print("Loading dataset (streaming)...")
 ds = load_dataset("LLM4Binary/decompile-ghidra-100k", split="train", streaming=True)
 
-# Get first 10 samples
-print("Fetching 10 samples...")
-samples = []
-for i, sample in enumerate(ds):
-    if i >= 10:
-        break
-    samples.append(sample)
-    print(f"  Sample {i+1}: {len(sample.get('ghidra_code', ''))} chars")
-
-# Save samples
-output_file = "samples.json"
-with open(output_file, "w") as f:
-    json.dump(samples, f, indent=2)
+# Write each sample as it arrives
+print(f"Fetching {NUM_SAMPLES} samples...")
+output_file = "samples.jsonl"
+first_sample = None
+count = 0
+with open(output_file, "w") as out:
+    for i, sample in enumerate(ds):
+        if i >= NUM_SAMPLES:
+            break
+        out.write(json.dumps(sample, separators=(",", ":")) + "\n")
+        if first_sample is None:
+            first_sample = sample
+        count += 1
+        print(f"  Sample {i+1}: {len(sample.get('ghidra_code', ''))} chars")
 
-print(f"\nSaved {len(samples)} samples to {output_file}")
+print(f"\nSaved {count} samples to {output_file}")
 
 # Show first sample structure
 print("\nSample structure:")
-for key in samples[0].keys():
-    val = samples[0][key]
+for key in first_sample.keys():
+    val = first_sample[key]
     if isinstance(val, str):
         print(f"  {key}: {len(val)} chars")
     else:
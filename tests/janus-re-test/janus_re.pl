@@ -14,6 +14,8 @@
 %% vuln_contradicted(+Func, -Reason) is nondet - enumerate vuln contradictions
 %% mitigation_present(+Func, -Mitigation) is nondet - enumerate mitigations
 %% clear_facts is det - retract all dynamic facts
+%% assert_analysis(+Func, +Name, +Roles, +Callees, +Purpose, +Conf, +Patterns) is det
+%%   - replace all dynamic facts with one function's analysis
 
 :- dynamic function/3.
 :- dynamic calls/3.
@@ -194,6 +196,16 @@ clear_facts :-
     retractall(bounds_check_before(_)),
     retractall(size_validation_before(_)).
 
+%% Load one function's analysis in a single call (one Python -> Prolog crossing)
+%% Roles lists parameter roles in argument order
+assert_analysis(Func, Name, Roles, Callees, Purpose, Confidence, Patterns) :-
+    clear_facts,
+    assertz(function(Func, Name, sig(void, []))),
+    forall(nth1(N, Roles, Role), assertz(arg_flows_to(Func, N, Role))),
+    forall(member(Callee, Callees), assertz(calls(Func, Callee, []))),
+    assertz(hypothesis(Func, Purpose, Confidence)),
+    forall(member(Pattern, Patterns), assertz(known_pattern(Func, Pattern))).
+
 %% Test runner
 run_test(Name, Setup, Expected) :-
     format('~n─────────────────────────────────────────────────────~n'),
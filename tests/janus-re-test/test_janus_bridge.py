@@ -6,14 +6,39 @@ Python extracts facts from decompiled code, Prolog checks constraints
 and catches contradictions, Python presents validated results.
 """
 
+import contextlib
+import functools
+import io
 import janus_swi as janus
 import json
+import multiprocessing
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 
-# Initialize Prolog with absolute path
 _script_dir = os.path.dirname(os.path.abspath(__file__))
-janus.consult(os.path.join(_script_dir, "janus_re.pl"))
+_prolog_loaded = False
+
+
+def _init_prolog():
+    """Consult janus_re.pl once per process (each worker has its own Prolog engine)."""
+    global _prolog_loaded
+    if not _prolog_loaded:
+        # Initialize Prolog with absolute path
+        janus.consult(os.path.join(_script_dir, "janus_re.pl"))
+        _prolog_loaded = True
+
+# One pass over the code body finds calls, stack canary references, and null
+# comparisons. Calls come first so __stack_chk_fail(...) is still a call.
+_GHIDRA_SCAN_RE = re.compile(
+    r'\b(?P<call>[A-Za-z_]\w+)\s*\('
+    r'|(?P<stack_check>__stack_chk_fail)'
+    r'|(?P<null_check>[!=]= 0)'
+)
+
+# Keywords and type casts that look like calls in decompiled code
+_RESERVED = frozenset({'if', 'while', 'for', 'return', 'long', 'int', 'uint', 'void'})
+
 
 def extract_facts_from_ghidra(ghidra_code: str) -> dict:
     """Extract facts from Ghidra decompiled code (Python pattern matching)."""
@@ -36,17 +61,22 @@ def extract_facts_from_ghidra(ghidra_code: str) -> dict:
         params = match.group(1).split(',')
         facts["params"] = [p.strip().split()[-1] for p in params if p.strip()]
 
-    # Check for function calls
-    calls = re.findall(r'\b([A-Za-z_]\w+)\s*\(', ghidra_code)
-    facts["calls"] = list(set(c for c in calls
-                               if c != facts["function_name"]
-                               and c not in ['if', 'while', 'for', 'return', 'long', 'int', 'uint', 'void']))
-
-    # Check for stack canary
-    facts["has_stack_check"] = '__stack_chk_fail' in ghidra_code
-
-    # Check for null checks
-    facts["has_null_check"] = '!= 0' in ghidra_code or '== 0' in ghidra_code
+    # Check for function calls, stack canary, and null checks
+    calls = set()
+    for match in _GHIDRA_SCAN_RE.finditer(ghidra_code):
+        kind = match.lastgroup
+        if kind == "call":
+            callee = match.group("call")
+            calls.add(callee)
+            if "__stack_chk_fail" in callee:
+                facts["has_stack_check"] = True
+        elif kind == "stack_check":
+            facts["has_stack_check"] = True
+        else:
+            facts["has_null_check"] = True
+
+    calls.discard(facts["function_name"])
+    facts["calls"] = list(calls - _RESERVED)
 
     return facts
 
@@ -61,26 +91,29 @@ def validate_role(role: str) -> str:
     return role
 
 
-def infer_param_role(param_name: str, code_body: str) -> str:
-    """Infer semantic role from parameter usage patterns."""
+@functools.lru_cache(maxsize=4096)
+def _param_patterns(param: str) -> tuple[tuple[re.Pattern, str], ...]:
+    """Compile role-inference patterns for one parameter, in priority order."""
     # Escape for regex (handle *param_1)
-    p = re.escape(param_name.lstrip('*'))
-
-    # Pattern 1: Counter - *p = *p + 1 or (*p)++
-    if re.search(rf'\*{p}\s*=\s*\*{p}\s*\+\s*1', code_body):
-        return validate_role("counter")
-    if re.search(rf'\(\s*\*{p}\s*\)\s*\+\+', code_body):
-        return validate_role("counter")
+    p = re.escape(param)
+
+    return (
+        # Pattern 1: Counter - *p = *p + 1 or (*p)++
+        (re.compile(rf'\*{p}\s*=\s*\*{p}\s*\+\s*1'), "counter"),
+        (re.compile(rf'\(\s*\*{p}\s*\)\s*\+\+'), "counter"),
+        # Pattern 2: Buffer - base in pointer arithmetic (base + idx * stride)
+        (re.compile(rf'{p}\s*\+\s*.*\*\s*\d+'), "buffer"),
+        (re.compile(rf'\(\s*long\s*\)\s*{p}\s*\*'), "buffer"),
+        # Pattern 3: Struct access - param[N] where N is small constant
+        (re.compile(rf'{p}\s*\[\s*\d\s*\]'), "struct_access"),
+    )
 
-    # Pattern 2: Buffer - base in pointer arithmetic (base + idx * stride)
-    if re.search(rf'{p}\s*\+\s*.*\*\s*\d+', code_body):
-        return validate_role("buffer")
-    if re.search(rf'\(\s*long\s*\)\s*{p}\s*\*', code_body):
-        return validate_role("buffer")
 
-    # Pattern 3: Struct access - param[N] where N is small constant
-    if re.search(rf'{p}\s*\[\s*\d\s*\]', code_body):
-        return validate_role("struct_access")
+def infer_param_role(param_name: str, code_body: str) -> str:
+    """Infer semantic role from parameter usage patterns."""
+    for pattern, role in _param_patterns(param_name.lstrip('*')):
+        if pattern.search(code_body):
+            return validate_role(role)
 
     return validate_role("unknown")
 
@@ -96,51 +129,34 @@ def find_sample_by_name(samples: list, func_name: str) -> dict:
 def assert_facts_to_prolog(func_id: str, facts: dict, hypothesis: tuple, code: str):
     """Load extracted facts into Prolog knowledge base.
 
-    All Prolog queries are wrapped in exception handling per janus-interop safety.
+    All facts go through one parameterized assert_analysis/7 query instead of
+    one query per fact. All Prolog queries are wrapped in exception handling
+    per janus-interop safety.
     """
-    try:
-        # Clear previous facts
-        janus.query_once("clear_facts")
+    # Parameter flows using pattern inference, in argument order
+    roles = [infer_param_role(param, code) for param in facts["params"]]
 
-        # Assert function
-        janus.query_once(
-            "assertz(function(FuncId, Name, sig(void, [])))",
-            {"FuncId": func_id, "Name": facts["function_name"]}
-        )
+    patterns = []
+    if facts["has_stack_check"]:
+        patterns.append("stack_protection")
+    if facts["has_null_check"]:
+        patterns.append("null_validation")
 
-        # Assert parameter flows using pattern inference
-        for i, param in enumerate(facts["params"], 1):
-            role = infer_param_role(param, code)
-            janus.query_once(
-                "assertz(arg_flows_to(FuncId, ArgN, Role))",
-                {"FuncId": func_id, "ArgN": i, "Role": role}
-            )
-
-        # Assert calls
-        for call in facts["calls"]:
-            janus.query_once(
-                "assertz(calls(FuncId, Callee, []))",
-                {"FuncId": func_id, "Callee": call}
-            )
-
-        # Assert hypothesis
-        hyp_purpose, hyp_confidence = hypothesis
+    hyp_purpose, hyp_confidence = hypothesis
+    try:
+        # Clears previous facts, then asserts function, flows, calls, hypothesis, patterns
         janus.query_once(
-            "assertz(hypothesis(FuncId, Purpose, Confidence))",
-            {"FuncId": func_id, "Purpose": hyp_purpose, "Confidence": hyp_confidence}
+            "assert_analysis(FuncId, Name, Roles, Callees, Purpose, Confidence, Patterns)",
+            {
+                "FuncId": func_id,
+                "Name": facts["function_name"],
+                "Roles": roles,
+                "Callees": facts["calls"],
+                "Purpose": hyp_purpose,
+                "Confidence": hyp_confidence,
+                "Patterns": patterns,
+            }
         )
-
-        # Assert patterns
-        if facts["has_stack_check"]:
-            janus.query_once(
-                "assertz(known_pattern(FuncId, stack_protection))",
-                {"FuncId": func_id}
-            )
-        if facts["has_null_check"]:
-            janus.query_once(
-                "assertz(known_pattern(FuncId, null_validation))",
-                {"FuncId": func_id}
-            )
     except janus.PrologError as e:
         print(f"  [ERROR] Failed to assert facts: {e}")
         raise
@@ -169,6 +185,7 @@ def check_mitigations(func_id: str) -> list:
 
 def run_janus_analysis(ghidra_code: str, hypothesis: tuple, ground_truth: str = None):
     """Run the Janus Reverse Engineering analysis pipeline."""
+    _init_prolog()
     print("\n" + "-" * 60)
 
     # Step 1: RECOGNIZE (Python pattern matching)
@@ -217,6 +234,22 @@ def run_janus_analysis(ghidra_code: str, hypothesis: tuple, ground_truth: str =
         "validated": not contradictions
     }
 
+def _analyze_one(case: tuple) -> tuple[str, dict]:
+    """Run one test case in a worker process, returning (captured_output, result).
+
+    Cases cannot share an interpreter because each one clears and reloads the
+    Prolog fact base, so every worker process gets its own engine.
+    """
+    title, ghidra_code, hypothesis, ground_truth = case
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        print("\n" + "=" * 60)
+        print(title)
+        print("=" * 60)
+        result = run_janus_analysis(ghidra_code, hypothesis, ground_truth)
+    return output.getvalue(), result
+
+
 def run_tests():
     """Run all test cases."""
     print("=" * 60)
@@ -224,56 +257,36 @@ def run_tests():
     print("=" * 60)
 
     # Load samples from dataset
-    samples_path = os.path.join(_script_dir, "samples.json")
+    samples_path = os.path.join(_script_dir, "samples.jsonl")
     with open(samples_path) as f:
-        samples = json.load(f)
-
-    # Test 1: GenerateNtPasswordHashHash (real crypto - should pass)
-    print("\n" + "=" * 60)
-    print("TEST 1: Password Hash Function (should validate)")
-    print("=" * 60)
+        samples = [json.loads(line) for line in f]
 
     hash_sample = find_sample_by_name(samples, "GenerateNtPasswordHashHash")
-    run_janus_analysis(
-        hash_sample["instruction"],
-        ("hash_md4", "high"),
-        hash_sample["output"]
-    )
-
-    # Test 2: hp3800_fixedpwm (scanner - false crypto, should contradict)
-    print("\n" + "=" * 60)
-    print("TEST 2: Scanner Driver - False Crypto (should contradict)")
-    print("=" * 60)
-
     scanner_sample = find_sample_by_name(samples, "hp3800_fixedpwm")
-    run_janus_analysis(
-        scanner_sample["instruction"],
-        ("crypto_operation", "low"),
-        scanner_sample["output"]
-    )
-
-    # Test 3: TCP function (network I/O - should pass)
-    print("\n" + "=" * 60)
-    print("TEST 3: TCP Network Function (should validate)")
-    print("=" * 60)
-
     tcp_sample = find_sample_by_name(samples, "ioabs_tcp_pre_select")
-    run_janus_analysis(
-        tcp_sample["instruction"],
-        ("network_io", "medium"),
-        tcp_sample["output"]
-    )
 
-    # Test 4: Same function with WRONG hypothesis
-    print("\n" + "=" * 60)
-    print("TEST 4: TCP Function with WRONG hypothesis (should contradict)")
-    print("=" * 60)
-
-    run_janus_analysis(
-        tcp_sample["instruction"],
-        ("aes_encrypt", "low"),
-        tcp_sample["output"]
-    )
+    cases = [
+        # Test 1: GenerateNtPasswordHashHash (real crypto - should pass)
+        ("TEST 1: Password Hash Function (should validate)",
+         hash_sample["instruction"], ("hash_md4", "high"), hash_sample["output"]),
+        # Test 2: hp3800_fixedpwm (scanner - false crypto, should contradict)
+        ("TEST 2: Scanner Driver - False Crypto (should contradict)",
+         scanner_sample["instruction"], ("crypto_operation", "low"), scanner_sample["output"]),
+        # Test 3: TCP function (network I/O - should pass)
+        ("TEST 3: TCP Network Function (should validate)",
+         tcp_sample["instruction"], ("network_io", "medium"), tcp_sample["output"]),
+        # Test 4: Same function with WRONG hypothesis
+        ("TEST 4: TCP Function with WRONG hypothesis (should contradict)",
+         tcp_sample["instruction"], ("aes_encrypt", "low"), tcp_sample["output"]),
+    ]
+
+    # Spawn (not fork) so no worker inherits a live Prolog engine
+    workers = min(len(cases), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=multiprocessing.get_context("spawn")) as executor:
+        # map() yields in submission order, so reports print in test order
+        for output, _ in executor.map(_analyze_one, cases):
+            print(output, end="")
 
     print("\n" + "=" * 60)
     print("JANUS BRIDGE TEST COMPLETE")
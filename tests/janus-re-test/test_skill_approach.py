@@ -8,164 +8,238 @@ This demonstrates how the skill's Prolog-based constraint checking would work:
 3. Check for contradictions before claiming
 """
 
+import functools
+import itertools
 import json
+import os
 import re
-
-# Load samples
-with open("samples.json") as f:
-    samples = json.load(f)
-
-print("=" * 70)
-print("JANUS REVERSE ENGINEERING SKILL TEST")
-print("=" * 70)
-
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+# Patterns compiled once rather than looked up in re's cache per sample. They
+# scan bytes: decompiled code is ASCII, and bytes patterns skip Unicode classes.
+_FUNC_RE = re.compile(rb'(\w+)\s*\([^)]*\)\s*{')
+_PARAMS_RE = re.compile(rb'\(([^)]+)\)')
+
+# One pass over the code finds hex constants, calls, the stack canary, loop
+# keywords, and pointer dereferences. Hex comes first so a constant is never
+# swallowed as a call name; "while (" and "__stack_chk_fail(" match as calls.
+_SCAN_RE = re.compile(
+    rb'(?P<hex>0x[0-9a-fA-F]+)'
+    rb'|\b(?P<call>\w+)\s*\('
+    rb'|(?P<stack>__stack_chk_fail)'
+    rb'|(?P<loop>\bdo\s*\{|\bwhile\b|\bfor\b)'
+    rb'|(?P<mem>\*\()'
+)
+
+# Control keywords that look like calls when followed by "("
+_CONTROL_KW = frozenset({b'if', b'while', b'for', b'return', b'switch', b'do'})
+
+@dataclass(frozen=True, slots=True)
+class Facts:
+    """Facts extracted from one function; frozen (hashable) so results can be cached."""
+    function_name: str | None = None
+    params: tuple[str, ...] = ()
+    calls: tuple[str, ...] = ()
+    has_stack_check: bool = False
+    has_crypto_constants: bool = False
+    has_loop: bool = False
+    writes_memory: bool = False
+    reads_memory: bool = False
+
+@functools.lru_cache(maxsize=4096)
 def extract_function_info(ghidra_code):
-    """Extract facts from Ghidra decompiled code."""
-    facts = {
-        "function_name": None,
-        "params": [],
-        "calls": [],
-        "has_stack_check": False,
-        "has_crypto_constants": False,
-        "has_loop": False,
-        "writes_memory": False,
-        "reads_memory": False,
-    }
+    """Extract facts from Ghidra decompiled code (memoized per code string)."""
+    code = ghidra_code.encode() if isinstance(ghidra_code, str) else ghidra_code
+    function_name = None
+    params = ()
+    has_stack_check = False
+    has_loop = False
+    touches_memory = False
 
     # Extract function name
-    match = re.search(r'(\w+)\s*\([^)]*\)\s*{', ghidra_code)
+    match = _FUNC_RE.search(code)
     if match:
-        facts["function_name"] = match.group(1)
+        function_name = match.group(1)
 
     # Extract parameters
-    match = re.search(r'\(([^)]+)\)', ghidra_code)
+    match = _PARAMS_RE.search(code)
     if match:
-        params = match.group(1).split(',')
-        facts["params"] = [p.strip() for p in params if p.strip()]
-
-    # Check for function calls
-    calls = re.findall(r'\b(\w+)\s*\(', ghidra_code)
-    facts["calls"] = [c for c in calls if c != facts["function_name"] and c not in ['if', 'while', 'for', 'return']]
-
-    # Check for stack canary
-    if '__stack_chk_fail' in ghidra_code:
-        facts["has_stack_check"] = True
-
-    # Check for crypto-like constants (hex values)
-    hex_constants = re.findall(r'0x[0-9a-fA-F]+', ghidra_code)
-    if len(hex_constants) > 3:
-        facts["has_crypto_constants"] = True
-
-    # Check for loops
-    if 'do {' in ghidra_code or 'while' in ghidra_code or 'for' in ghidra_code:
-        facts["has_loop"] = True
-
-    # Check for memory operations
-    if '*(' in ghidra_code or '*(int' in ghidra_code or '*(long' in ghidra_code:
-        facts["writes_memory"] = True
-        facts["reads_memory"] = True
-
-    return facts
-
+        params = tuple(filter(None, map(str.strip, match.group(1).decode().split(','))))
+
+    # Check for function calls, crypto-like constants (hex values), stack
+    # canary, loops, and memory operations
+    calls = []
+    hex_count = 0
+    for match in _SCAN_RE.finditer(code):
+        kind = match.lastgroup
+        if kind == "hex":
+            hex_count += 1
+        elif kind == "call":
+            callee = match.group("call")
+            calls.append(callee)
+            if callee in (b'while', b'for'):
+                has_loop = True
+            elif b'__stack_chk_fail' in callee:
+                has_stack_check = True
+        elif kind == "stack":
+            has_stack_check = True
+        elif kind == "loop":
+            has_loop = True
+        else:
+            touches_memory = True
+
+    # Decode to str only for the values stored in Facts
+    return Facts(
+        function_name=function_name and function_name.decode(),
+        params=params,
+        calls=tuple(c.decode() for c in calls if c != function_name and c not in _CONTROL_KW),
+        has_stack_check=has_stack_check,
+        has_crypto_constants=hex_count > 3,
+        has_loop=has_loop,
+        writes_memory=touches_memory,
+        reads_memory=touches_memory,
+    )
+
+@functools.lru_cache(maxsize=4096)
 def form_hypothesis(facts):
-    """Form hypothesis based on extracted facts (pattern matching)."""
+    """Form hypothesis based on extracted facts (pattern matching, memoized per Facts)."""
     hypotheses = []
 
     # Check function name for hints
-    name = facts["function_name"] or ""
-    if "hash" in name.lower() or "md4" in name.lower() or "md5" in name.lower():
+    lname = (facts.function_name or "").lower()
+    if "hash" in lname or "md4" in lname or "md5" in lname:
         hypotheses.append(("crypto_hash", "high", "function name contains hash/md"))
-    if "password" in name.lower():
+    if "password" in lname:
         hypotheses.append(("handles_credentials", "medium", "function name contains password"))
-    if "tcp" in name.lower() or "socket" in name.lower():
+    if "tcp" in lname or "socket" in lname:
         hypotheses.append(("network_io", "medium", "function name contains tcp/socket"))
 
     # Check for crypto patterns
-    if facts["has_crypto_constants"] and facts["has_loop"]:
+    if facts.has_crypto_constants and facts.has_loop:
         hypotheses.append(("crypto_operation", "low", "has hex constants and loop"))
 
     # Check for stack protection
-    if facts["has_stack_check"]:
+    if facts.has_stack_check:
         hypotheses.append(("stack_protected", "high", "calls __stack_chk_fail"))
 
-    return hypotheses
+    return tuple(hypotheses)
+
+def _check_crypto_hash(facts, contradictions):
+    """Crypto hash should call a hash function."""
+    lowered_calls = [c.lower() for c in facts.calls]
+    if not any("hash" in c or "md" in c for c in lowered_calls):
+        contradictions.append(("crypto_hash", "missing_call", "no hash function called"))
+
+def _check_crypto_operation(facts, contradictions):
+    """Crypto operation should have key input."""
+    if len(facts.params) < 2:
+        contradictions.append(("crypto_operation", "missing_input", "crypto needs key + data, only {} params".format(len(facts.params))))
+
+# Contradiction checks by hypothesis; hypotheses without an entry have none
+CHECKERS = {
+    "crypto_hash": _check_crypto_hash,
+    "crypto_operation": _check_crypto_operation,
+}
 
 def check_contradictions(facts, hypotheses):
     """Check for contradictions (Prolog constraint checking simulation)."""
     contradictions = []
 
+    # Walk hypotheses in order so contradictions are reported in that order
     for hyp, conf, reason in hypotheses:
-        if hyp == "crypto_hash":
-            # Crypto hash should call a hash function
-            hash_calls = [c for c in facts["calls"] if "hash" in c.lower() or "md" in c.lower()]
-            if not hash_calls:
-                contradictions.append((hyp, "missing_call", "no hash function called"))
-
-        if hyp == "crypto_operation":
-            # Should have key input
-            if len(facts["params"]) < 2:
-                contradictions.append((hyp, "missing_input", "crypto needs key + data, only {} params".format(len(facts["params"]))))
+        checker = CHECKERS.get(hyp)
+        if checker:
+            checker(facts, contradictions)
 
     return contradictions
 
 def run_skill_test(sample_idx, ghidra_code, source_code):
-    """Run the skill test on a single sample."""
-    print(f"\n{'─' * 70}")
-    print(f"SAMPLE {sample_idx + 1}")
-    print(f"{'─' * 70}")
+    """Run the skill test on a single sample, returning its report."""
+    out = []
+    out.append(f"\n{'─' * 70}")
+    out.append(f"SAMPLE {sample_idx + 1}")
+    out.append(f"{'─' * 70}")
 
     # Step 1: Extract facts (RECOGNIZE)
     facts = extract_function_info(ghidra_code)
-    print(f"\n[1] RECOGNIZE - Extracted facts:")
-    print(f"    Function: {facts['function_name']}")
-    print(f"    Params: {len(facts['params'])}")
-    print(f"    Calls: {facts['calls'][:5]}{'...' if len(facts['calls']) > 5 else ''}")
-    print(f"    Stack check: {facts['has_stack_check']}")
-    print(f"    Crypto constants: {facts['has_crypto_constants']}")
+    out.append(f"\n[1] RECOGNIZE - Extracted facts:")
+    out.append(f"    Function: {facts.function_name}")
+    out.append(f"    Params: {len(facts.params)}")
+    out.append(f"    Calls: {list(facts.calls[:5])}{'...' if len(facts.calls) > 5 else ''}")
+    out.append(f"    Stack check: {facts.has_stack_check}")
+    out.append(f"    Crypto constants: {facts.has_crypto_constants}")
 
     # Step 2: Form hypotheses (ASSERT)
     hypotheses = form_hypothesis(facts)
-    print(f"\n[2] ASSERT - Hypotheses formed:")
+    out.append(f"\n[2] ASSERT - Hypotheses formed:")
     if hypotheses:
         for hyp, conf, reason in hypotheses:
-            print(f"    hypothesis({facts['function_name']}, {hyp}, {conf})")
-            print(f"        Reason: {reason}")
+            out.append(f"    hypothesis({facts.function_name}, {hyp}, {conf})")
+            out.append(f"        Reason: {reason}")
     else:
-        print("    (no strong hypotheses from patterns)")
+        out.append("    (no strong hypotheses from patterns)")
 
     # Step 3: Check contradictions (CHECK)
     contradictions = check_contradictions(facts, hypotheses)
-    print(f"\n[3] CHECK - Contradiction query:")
+    out.append(f"\n[3] CHECK - Contradiction query:")
     if contradictions:
         for hyp, kind, detail in contradictions:
-            print(f"    CONTRADICTION: {hyp} - {kind}")
-            print(f"        {detail}")
+            out.append(f"    CONTRADICTION: {hyp} - {kind}")
+            out.append(f"        {detail}")
     else:
-        print("    No contradictions found")
+        out.append("    No contradictions found")
 
     # Step 4: Resolve or present (RESOLVE/PRESENT)
-    print(f"\n[4] PRESENT - Final assessment:")
-    valid_hypotheses = [h for h in hypotheses if h[0] not in [c[0] for c in contradictions]]
+    out.append(f"\n[4] PRESENT - Final assessment:")
+    bad = {c[0] for c in contradictions}
+    valid_hypotheses = [h for h in hypotheses if h[0] not in bad]
     if valid_hypotheses:
         for hyp, conf, reason in valid_hypotheses:
-            print(f"    ✓ {hyp} (confidence: {conf})")
+            out.append(f"    ✓ {hyp} (confidence: {conf})")
     else:
-        print("    No validated hypotheses - need more analysis")
+        out.append("    No validated hypotheses - need more analysis")
 
     # Compare with ground truth
-    print(f"\n[GROUND TRUTH] Original source excerpt:")
+    out.append(f"\n[GROUND TRUTH] Original source excerpt:")
     source_lines = source_code.split('\n')[:3]
     for line in source_lines:
-        print(f"    {line}")
-
-# Run tests on samples
-for i, sample in enumerate(samples[:5]):  # Test first 5
-    run_skill_test(i, sample["instruction"], sample["output"])
-
-print("\n" + "=" * 70)
-print("TEST COMPLETE")
-print("=" * 70)
-print("""
+        out.append(f"    {line}")
+
+    return "\n".join(out) + "\n"
+
+def run_skill_group(ghidra_code, members):
+    """Run the skill test on samples sharing the same decompiled code."""
+    return [(idx, run_skill_test(idx, ghidra_code, source_code)) for idx, source_code in members]
+
+def main():
+    """Run the skill test on the first 5 samples."""
+    # Load samples; JSONL holds one per line, so stop reading after the first 5
+    with open("samples.jsonl") as f:
+        samples = [json.loads(line) for line in itertools.islice(f, 5)]  # Test first 5
+
+    print("=" * 70)
+    print("JANUS REVERSE ENGINEERING SKILL TEST")
+    print("=" * 70)
+
+    # Group samples by decompiled code, so identical ones share a worker and its caches
+    groups = {}
+    for idx, sample in enumerate(samples):
+        groups.setdefault(sample["instruction"], []).append((idx, sample["output"]))
+
+    # Run tests on samples
+    reports = [None] * len(samples)
+    workers = min(len(groups), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for results in executor.map(run_skill_group, groups.keys(), groups.values()):
+            for idx, report in results:
+                reports[idx] = report
+    print("".join(reports), end="")
+
+    print("\n" + "=" * 70)
+    print("TEST COMPLETE")
+    print("=" * 70)
+    print("""
 This demonstrates the janus-reverse-engineering skill's approach:
 1. RECOGNIZE: Extract structural facts from decompiled code
 2. ASSERT: Form hypotheses based on patterns
@@ -175,3 +249,6 @@ This demonstrates the janus-reverse-engineering skill's approach:
 In a real implementation, Prolog would handle constraint propagation
 and catch logical contradictions the pattern matcher misses.
 """)
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
 """Test that all 7 prompts are present (6 original + PARADIGM FIT)"""
+import functools
+import re
 from pathlib import Path
 
 REQUIRED_PROMPTS = [
@@ -22,27 +24,27 @@ PROMPT_ALTERNATIVES = {
     "PARADIGM FIT": ["paradigm fit", "paradigm mismatch", "paradigm switch"],
 }
 
+# Each prompt matches itself or any alternative phrasing, ignoring case
+_PROMPT_UNION = {
+    prompt: re.compile(
+        "|".join(map(re.escape, [prompt, *PROMPT_ALTERNATIVES.get(prompt, [])])),
+        re.IGNORECASE,
+    )
+    for prompt in REQUIRED_PROMPTS
+}
+
 
+@functools.lru_cache(maxsize=None)
 def read_skill(skill_name: str) -> str:
     """Read skill content from SKILL.md"""
     skill_path = Path(__file__).parent.parent.parent / "skills" / skill_name / "SKILL.md"
     return skill_path.read_text()
 
 
-def similar_phrase(prompt: str, content: str) -> bool:
-    """Check if any alternative phrasing of the prompt is present"""
-    content_lower = content.lower()
-    alternatives = PROMPT_ALTERNATIVES.get(prompt, [])
-    return any(alt.lower() in content_lower for alt in alternatives)
-
-
 def test_all_prompts_present():
     """Verify all protocol prompts are present in janus-reasoning"""
     content = read_skill("janus-reasoning")
-    missing = []
-    for prompt in REQUIRED_PROMPTS:
-        if prompt not in content and not similar_phrase(prompt, content):
-            missing.append(prompt)
+    missing = [prompt for prompt, pattern in _PROMPT_UNION.items() if not pattern.search(content)]
 
     assert not missing, f"Missing prompts in janus-reasoning: {missing}"
 
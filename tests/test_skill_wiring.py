@@ -1,7 +1,14 @@
 """Test cross-skill handoffs are documented"""
+import functools
+import re
 from pathlib import Path
 
+# A table (both "|" and "Skill" anywhere in the content) or a handoff/routing
+# section (case-insensitive), checked in one search without lowercasing the file
+_HANDOFF_RE = re.compile(r'\A(?=.*\|)(?=.*Skill)|(?i:handoff|routing)', re.DOTALL)
 
+
+@functools.lru_cache(maxsize=None)
 def read_skill(skill_name: str) -> str:
     """Read skill content from SKILL.md"""
     skill_path = Path(__file__).parent / "skills" / skill_name / "SKILL.md"
@@ -11,45 +18,45 @@ def read_skill(skill_name: str) -> str:
     return skill_path.read_text()
 
 
+@functools.lru_cache(maxsize=None)
+def _skill_tokens(skill_name: str) -> frozenset[str]:
+    """Words in a skill's content; hyphens are kept so skill names stay whole"""
+    return frozenset(re.split(r'[^\w-]+', read_skill(skill_name)))
+
+
 def test_janus_reasoning_references_interop():
     """Verify janus-reasoning mentions handoff to janus-interop"""
-    content = read_skill("janus-reasoning")
-    assert "janus-interop" in content, \
+    assert "janus-interop" in _skill_tokens("janus-reasoning"), \
         "janus-reasoning must reference janus-interop for safety checklist handoff"
 
 
 def test_janus_re_references_reasoning():
     """Verify janus-reverse-engineering mentions handoff to janus-reasoning"""
-    content = read_skill("janus-reverse-engineering")
-    assert "janus-reasoning" in content, \
+    assert "janus-reasoning" in _skill_tokens("janus-reverse-engineering"), \
         "janus-reverse-engineering must reference janus-reasoning for unresolvable contradictions"
 
 
 def test_janus_re_references_interop():
     """Verify janus-reverse-engineering mentions handoff to janus-interop"""
-    content = read_skill("janus-reverse-engineering")
-    assert "janus-interop" in content, \
+    assert "janus-interop" in _skill_tokens("janus-reverse-engineering"), \
         "janus-reverse-engineering must reference janus-interop before Prolog queries"
 
 
 def test_using_superpowers_routes_to_reasoning():
     """Verify using-superpowers documents routing to janus-reasoning"""
-    content = read_skill("using-superpowers")
-    assert "janus-reasoning" in content, \
+    assert "janus-reasoning" in _skill_tokens("using-superpowers"), \
         "using-superpowers must route confusion triggers to janus-reasoning"
 
 
 def test_using_superpowers_routes_to_interop():
     """Verify using-superpowers documents routing to janus-interop"""
-    content = read_skill("using-superpowers")
-    assert "janus-interop" in content, \
+    assert "janus-interop" in _skill_tokens("using-superpowers"), \
         "using-superpowers must route Prolog/Python interop to janus-interop"
 
 
 def test_using_superpowers_routes_to_re():
     """Verify using-superpowers documents routing to janus-reverse-engineering"""
-    content = read_skill("using-superpowers")
-    assert "janus-reverse-engineering" in content, \
+    assert "janus-reverse-engineering" in _skill_tokens("using-superpowers"), \
         "using-superpowers must route RE analysis to janus-reverse-engineering"
 
 
@@ -57,7 +64,5 @@ def test_handoff_table_exists():
     """Verify using-superpowers has a handoff or routing table"""
     content = read_skill("using-superpowers")
     # Check for table markers or handoff section
-    has_table = "|" in content and "Skill" in content
-    has_handoff_section = "handoff" in content.lower() or "routing" in content.lower()
-    assert has_table or has_handoff_section, \
+    assert _HANDOFF_RE.search(content), \
         "using-superpowers must have a skill routing table or handoff section"